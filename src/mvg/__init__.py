@@ -1,5 +1,5 @@
 """An unofficial interface to timetable information of the Münchner Verkehrsgesellschaft (MVG)."""
 
-from .mvgapi import MvgApi, MvgApiError, TransportType
+from .mvgapi import Departure, MvgApi, MvgApiError, Station, TransportType
 
-__all__ = ["MvgApi", "MvgApiError", "TransportType"]
+__all__ = ["Departure", "MvgApi", "MvgApiError", "Station", "TransportType"]
@@ -3,14 +3,340 @@
 from __future__ import annotations
 
 import asyncio
-import re
+import os
+import threading
+import time
+from dataclasses import dataclass
 from enum import Enum
-from typing import Any, List, Dict, Optional
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Coroutine,
+    FrozenSet,
+    Iterator,
+    List,
+    Dict,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+)
 
 import aiohttp
-from furl import furl
+import orjson
+
+try:
+    import httpx
+except ImportError:
+    httpx = None  # type: ignore[assignment]  # HTTP/2 support is optional
+
+try:
+    import ijson
+except ImportError:
+    ijson = None  # streaming JSON parsing is optional
 
 MVGAPI_DEFAULT_LIMIT = 10  # API defaults to 10, limits to 100
+MVGAPI_CONNECTION_LIMIT = 100  # total connections in the shared pool
+MVGAPI_CONNECTION_LIMIT_PER_HOST = 32  # connections per host in the shared pool
+MVGAPI_TIMEOUT = 30  # total timeout per request in seconds
+MVGAPI_STATIC_TTL = 3600  # seconds to cache station ids and stations
+MVGAPI_LINES_TTL = 600  # seconds to cache lines
+MVGAPI_HTTP2 = os.environ.get("MVGAPI_HTTP2", "") == "1"  # use httpx with HTTP/2 instead of aiohttp
+MVGAPI_CHECK_CONTENT_TYPE = os.environ.get("MVGAPI_CHECK_CONTENT_TYPE", "") == "1"  # reject non-JSON content types
+
+_ACCEPT = "application/json, text/plain, */*"
+# Sessions and clients are bound to the event loop they were created in, so there is one per loop
+# Each is kept together with a generator closing it when the loop shuts down, see _close_with_loop
+_sessions: Dict[asyncio.AbstractEventLoop, Tuple[aiohttp.ClientSession, AsyncGenerator[None, None]]] = {}
+_clients: Dict[asyncio.AbstractEventLoop, Tuple[httpx.AsyncClient, AsyncGenerator[None, None]]] = {}
+_cache: Dict[Tuple[Any, ...], Tuple[float, Any]] = {}
+_etags: Dict[Tuple[Any, ...], Tuple[str, bytes]] = {}
+_loop: Optional[asyncio.AbstractEventLoop] = None  # pylint: disable=invalid-name
+_loop_lock = threading.Lock()
+
+_T = TypeVar("_T")
+
+
+def _run(coro: Coroutine[Any, Any, _T]) -> _T:
+    """
+    Run a coroutine on the background event loop and wait for its result.
+
+    The loop is started in a daemon thread on first use and kept alive, so the shared
+    client session and its pooled connections persist across synchronous calls.
+
+    :param coro: the coroutine to run
+    :raises RuntimeError: raised if called from a running event loop, which would be blocked
+    :return: the result of the coroutine
+    """
+    global _loop  # pylint: disable=global-statement
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        coro.close()
+        raise RuntimeError("Synchronous methods of MvgApi cannot be called from a running event loop")
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="mvgapi", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, _loop).result()
+
+
+def _cache_get(key: Tuple[Any, ...], ttl: float) -> Any:
+    """
+    Return a cached result.
+
+    :param key: the cache key
+    :param ttl: time to live of a cached result in seconds
+    :return: the cached result or None if there is none or it expired
+    """
+    hit = _cache.get(key)
+    if hit is not None and time.monotonic() - hit[0] < ttl:
+        return hit[1]
+    return None
+
+
+def _cache_set(key: Tuple[Any, ...], result: Any) -> None:
+    """
+    Cache a result.
+
+    :param key: the cache key
+    :param result: the result to cache
+    """
+    _cache[key] = (time.monotonic(), result)
+
+
+async def _cached(key: Tuple[Any, ...], ttl: float, fetch: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Return a cached result or fetch and cache it.
+
+    :param key: the cache key
+    :param ttl: time to live of a cached result in seconds
+    :param fetch: coroutine function to retrieve the result on a cache miss
+    :return: the cached or fetched result
+    """
+    result = _cache_get(key, ttl)
+    if result is None:
+        result = await fetch()
+        _cache_set(key, result)
+    return result
+
+
+async def _cached_json(key: Tuple[Any, ...], ttl: float, fetch: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Return a copy of a cached result or fetch and cache it.
+
+    The result is kept as JSON and parsed again on each hit, so callers never share mutable results.
+
+    :param key: the cache key
+    :param ttl: time to live of a cached result in seconds
+    :param fetch: coroutine function to retrieve the result on a cache miss
+    :return: the cached or fetched result
+    """
+    body = _cache_get(key, ttl)
+    if body is not None:
+        return orjson.loads(body)
+    result = await fetch()
+    _cache_set(key, orjson.dumps(result))
+    return result
+
+
+async def _close_with_loop(close: Callable[[], Awaitable[Any]]) -> AsyncGenerator[None, None]:
+    """
+    Close a session or client when its event loop shuts down.
+
+    Once started, the generator is registered with the running loop. asyncio.run() and
+    loop.shutdown_asyncgens() finalize it before the loop is closed, so sessions of short-lived loops
+    release their connections. aclose() finalizes it earlier.
+
+    :param close: coroutine function closing the session or client
+    """
+    try:
+        yield
+    finally:
+        await close()
+
+
+def _forget_closed_loops(by_loop: Dict[asyncio.AbstractEventLoop, Any]) -> None:
+    """
+    Drop the sessions or clients of event loops which were closed without shutting down.
+
+    Their connections cannot be closed anymore, and a session references its loop, so weak keys would
+    not release it.
+
+    :param by_loop: sessions or clients by event loop
+    """
+    for loop in [loop for loop in by_loop if loop.is_closed()]:
+        del by_loop[loop]
+
+
+async def _get_session() -> aiohttp.ClientSession:
+    """
+    Return the client session of the running event loop, creating it on first use.
+
+    Sessions of other loops are left untouched, as they may be in use by concurrent requests.
+
+    :return: the shared client session
+    """
+    loop = asyncio.get_running_loop()
+    entry = _sessions.get(loop)
+    if entry is not None and not entry[0].closed:
+        return entry[0]
+    _forget_closed_loops(_sessions)
+    try:
+        # Non-blocking DNS lookups based on aiodns
+        resolver: aiohttp.abc.AbstractResolver = aiohttp.AsyncResolver()
+    except RuntimeError:
+        # aiodns is not usable, e.g. on Windows with the proactor event loop
+        resolver = aiohttp.ThreadedResolver()
+    session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(
+            resolver=resolver,
+            limit=MVGAPI_CONNECTION_LIMIT,
+            limit_per_host=MVGAPI_CONNECTION_LIMIT_PER_HOST,
+            use_dns_cache=True,
+            ttl_dns_cache=300,
+            keepalive_timeout=60,
+        ),
+        timeout=aiohttp.ClientTimeout(total=MVGAPI_TIMEOUT),
+        headers={"Accept": _ACCEPT},
+    )
+
+    async def close() -> None:
+        await session.close()
+        # The connector only closes resolvers it created itself
+        await resolver.close()
+
+    closer = _close_with_loop(close)
+    await closer.__anext__()
+    _sessions[loop] = (session, closer)
+    return session
+
+
+async def _get_client() -> httpx.AsyncClient:
+    """
+    Return the HTTP/2 client of the running event loop, creating it on first use.
+
+    Like client sessions, there is one client per loop.
+
+    :raises ImportError: raised if the optional dependency httpx is not installed
+    :return: the shared HTTP/2 client
+    """
+    if httpx is None:
+        raise ImportError("HTTP/2 requires the optional dependency 'httpx[http2]'")
+    loop = asyncio.get_running_loop()
+    entry = _clients.get(loop)
+    if entry is not None and not entry[0].is_closed:
+        return entry[0]
+    _forget_closed_loops(_clients)
+    client = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=10, max_keepalive_connections=10),
+        timeout=MVGAPI_TIMEOUT,
+        headers={"Accept": _ACCEPT},
+    )
+    closer = _close_with_loop(client.aclose)
+    await closer.__anext__()
+    _clients[loop] = (client, closer)
+    return client
+
+
+async def _get_aiohttp(
+        url: str, params: Optional[Dict[str, Any]], headers: Dict[str, str]
+) -> Tuple[int, str, Optional[str], bytes]:
+    """
+    Send a GET request using aiohttp.
+
+    :param url: the URL without query
+    :param params: the query arguments
+    :param headers: additional request headers
+    :raises MvgApiError: raised on communication failure
+    :return: status, Content-Type header, ETag and body of the response
+    """
+    try:
+        session = await _get_session()
+        async with session.get(url, params=params, headers=headers) as resp:
+            return resp.status, resp.headers.get("Content-Type", ""), resp.headers.get("ETag"), await resp.read()
+    except aiohttp.ClientError as exc:
+        raise MvgApiError(f"Bad API call: Got {str(type(exc))} from {url}") from exc
+
+
+class _ArrayStream:  # pylint: disable=too-few-public-methods
+    """A response stream which rejects JSON documents other than arrays before they are parsed."""
+
+    def __init__(self, content: aiohttp.StreamReader, url: str) -> None:
+        """Initialize the stream."""
+        self._content = content
+        self._url = url
+        self._checked = False
+
+    async def read(self, size: int = -1) -> bytes:
+        """
+        Read up to size bytes of the response.
+
+        :param size: maximum number of bytes, or -1 to read all
+        :raises MvgApiError: raised if the response is not an array
+        :return: the bytes read
+        """
+        data = await self._content.read(size)
+        if not self._checked:
+            start = data.lstrip()
+            if start:
+                if not start.startswith(b"["):
+                    raise MvgApiError(f"Bad API call: Expected an array from {self._url}")
+                self._checked = True
+        return data
+
+
+async def _iter_aiohttp(url: str, params: Optional[Dict[str, Any]]) -> AsyncIterator[Any]:
+    """
+    Send a GET request using aiohttp and parse the items of a JSON array while the body arrives.
+
+    :param url: the URL without query
+    :param params: the query arguments
+    :raises MvgApiError: raised on communication failure or unexpected result
+    :return: an asynchronous iterator over the items
+    """
+    try:
+        session = await _get_session()
+        async with session.get(url, params=params) as resp:
+            if resp.status != 200:
+                raise MvgApiError(f"Bad API call: Got response ({resp.status}) from {url}")
+            content_type = resp.headers.get("Content-Type", "")
+            if MVGAPI_CHECK_CONTENT_TYPE and not content_type.startswith("application/json"):
+                raise MvgApiError(f"Bad API call: Got content type {content_type} from {url}")
+            async for item in ijson.items(_ArrayStream(resp.content, url), "item", use_float=True):
+                yield item
+    except aiohttp.ClientError as exc:
+        raise MvgApiError(f"Bad API call: Got {str(type(exc))} from {url}") from exc
+    except ijson.JSONError as exc:
+        raise MvgApiError(f"Bad API call: Got invalid JSON from {url}") from exc
+
+
+async def _get_httpx(
+        url: str, params: Optional[Dict[str, Any]], headers: Dict[str, str]
+) -> Tuple[int, str, Optional[str], bytes]:
+    """
+    Send a GET request using httpx with HTTP/2.
+
+    :param url: the URL without query
+    :param params: the query arguments
+    :param headers: additional request headers
+    :raises MvgApiError: raised on communication failure
+    :return: status, Content-Type header, ETag and body of the response
+    """
+    client = await _get_client()
+    try:
+        resp = await client.get(url, params=params, headers=headers)
+        return resp.status_code, resp.headers.get("Content-Type", ""), resp.headers.get("ETag"), resp.content
+    except httpx.HTTPError as exc:
+        raise MvgApiError(f"Bad API call: Got {str(type(exc))} from {url}") from exc
 
 
 class Base(Enum):
@@ -33,6 +359,21 @@ class Endpoint(Enum):
     MESSAGE = ("/message", [])  # Corrected endpoint for messages
 
 
+def _url(base: Base, endpoint: Endpoint, path_param: Optional[str] = None) -> str:
+    """
+    Return the URL of an API endpoint without query.
+
+    :param base: the API base
+    :param endpoint: the endpoint
+    :param path_param: additional path parameter if needed (e.g., station_id for line/station)
+    :return: the URL
+    """
+    endpoint_path, _ = endpoint.value
+    if path_param:
+        return f"{base.value}{endpoint_path}/{path_param}"
+    return f"{base.value}{endpoint_path}"
+
+
 class TransportType(Enum):
     """MVG products defined by the API with name and icon."""
 
@@ -46,15 +387,121 @@ class TransportType(Enum):
     SCHIFF: tuple[str, str] = ("Schiff", "mdi:ferry")
 
     @classmethod
-    def all(cls) -> List[TransportType]:
-        """Return a list of all products except SEV."""
-        return [member for name, member in cls.__members__.items() if name != "SEV"]
+    def all(cls) -> Tuple[TransportType, ...]:
+        """Return a tuple of all products except SEV."""
+        return _ALL_TRANSPORT_TYPES
+
+
+# Name and icon by transport type as used in API results
+_TRANSPORT_TYPE_INFO: Dict[str, Tuple[str, str]] = {
+    name: member.value for name, member in TransportType.__members__.items()
+}
+_ALL_TRANSPORT_TYPES = tuple(member for name, member in TransportType.__members__.items() if name != "SEV")
+_ALL_TRANSPORT_TYPES_ARG = ",".join(member.name for member in _ALL_TRANSPORT_TYPES)
 
 
 class MvgApiError(Exception):
     """Failed communication with MVG API."""
 
 
+class _FieldMapping(Mapping[str, Any]):
+    """Read-only mapping of the field names of a slotted data class to their values, for backward compatibility."""
+
+    __slots__: Tuple[str, ...] = ()
+
+    def __getitem__(self, key: str) -> Any:
+        """Return a field by name like a dictionary."""
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the field names like a dictionary."""
+        return iter(self.__slots__)
+
+    def __len__(self) -> int:
+        """Return the number of fields."""
+        return len(self.__slots__)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the fields as dictionary."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+@dataclass
+class Station(_FieldMapping):
+    """A station with global station id, name, place and coordinates.
+
+    For backward compatibility, the station can also be read like a dictionary with the keys 'id', 'name',
+    'place', 'latitude', 'longitude' (e.g. ``station['id']`` or ``dict(station)``).
+    """
+
+    __slots__ = ("id", "name", "place", "latitude", "longitude")
+
+    id: str
+    name: str
+    place: str
+    latitude: float
+    longitude: float
+
+
+@dataclass
+class Departure(_FieldMapping):  # pylint: disable=too-many-instance-attributes
+    """A departure with realtime and planned time as timestamps, line, destination and transport type.
+
+    For backward compatibility, the departure can also be read like a dictionary with the keys 'time', 'planned',
+    'line', 'destination', 'type', 'icon', 'cancelled', 'messages' (e.g. ``departure['line']``).
+    """
+
+    __slots__ = ("time", "planned", "line", "destination", "type", "icon", "cancelled", "messages")
+
+    time: int
+    planned: int
+    line: str
+    destination: str
+    type: str
+    icon: str
+    cancelled: bool
+    messages: List[Any]
+
+
+def _project_station(location: Dict[str, Any]) -> Station:
+    """
+    Convert a location of type station from the API to a station.
+
+    :param location: a location as returned by the API
+    :return: the station
+    """
+    return Station(
+        id=location.get("globalId", ""),
+        name=location.get("name", ""),
+        place=location.get("place", ""),
+        latitude=location.get("latitude", 0.0),
+        longitude=location.get("longitude", 0.0),
+    )
+
+
+def _project_departure(departure: Dict[str, Any]) -> Departure:
+    """
+    Convert a departure from the API to a departure.
+
+    :param departure: a departure as returned by the API
+    :return: the departure
+    """
+    # Handle unexpected transport types gracefully
+    type_name, type_icon = _TRANSPORT_TYPE_INFO.get(departure.get("transportType", ""), _TRANSPORT_TYPE_INFO["BAHN"])
+    return Departure(
+        time=int(departure.get("realtimeDepartureTime", 0)) // 1000,
+        planned=int(departure.get("plannedDepartureTime", 0)) // 1000,
+        line=departure.get("label", ""),
+        destination=departure.get("destination", ""),
+        type=type_name,
+        icon=type_icon,
+        cancelled=departure.get("cancelled", False),
+        messages=departure.get("messages", []),
+    )
+
+
 class MvgApi:
     """A class interface to retrieve stations, lines, and departures from the MVG.
 
@@ -72,11 +519,40 @@ class MvgApi:
         if self.valid_station_id(station):
             self.station_id = station
         else:
-            station_details = self.station_query_sync(station)  # Use synchronous wrapper
-            if station_details:
-                self.station_id = station_details["id"]
-            else:
-                raise ValueError("Invalid station name or ID.")
+            self.station_id = _run(MvgApi.__query_station_id(station))
+
+    @classmethod
+    async def create(cls, station: str) -> MvgApi:
+        """
+        Create the MVG interface from within a running event loop.
+
+        :param station: name, place ('Universität, München') or global station id (e.g. 'de:09162:70')
+        :raises MvgApiError: raised on communication failure or unexpected result
+        :raises ValueError: raised on bad station id format
+        :return: the MVG interface
+        """
+        instance = cls.__new__(cls)
+        station = station.strip()
+        if cls.valid_station_id(station):
+            instance.station_id = station
+        else:
+            instance.station_id = await MvgApi.__query_station_id(station)
+        return instance
+
+    @staticmethod
+    async def __query_station_id(query: str) -> str:
+        """
+        Find the global station id of a station by station name and place.
+
+        :param query: name, place (e.g., 'Hauptbahnhof, München')
+        :raises MvgApiError: raised on communication failure or unexpected result
+        :raises ValueError: raised if no station was found
+        :return: the global station id
+        """
+        station = await MvgApi.station_query(query)
+        if station is None:
+            raise ValueError("Invalid station name or ID.")
+        return station.id
 
     @staticmethod
     def valid_station_id(station_id: str, validate_existence: bool = False) -> bool:
@@ -85,28 +561,51 @@ class MvgApi:
 
         :param station_id: a global station id (e.g. 'de:09162:70')
         :param validate_existence: validate the existence in a list from the API
+        :raises MvgApiError: raised on communication failure or unexpected result when validating the existence
+        :raises RuntimeError: raised when validating the existence from a running event loop, use
+            valid_station_id_async instead
         :return: True if valid, False if Invalid
         """
-        valid_format = bool(re.fullmatch(r"de:\d{2,5}:\d+", station_id))
-        if not valid_format:
+        # Format 'de:' + 2 to 5 digits + ':' + digits, checked without the regex engine
+        if not station_id.startswith("de:"):
+            return False
+        separator = station_id.find(":", 3)
+        if not 5 <= separator <= 8:
+            return False
+        if not (station_id[3:separator].isdecimal() and station_id[separator + 1 :].isdecimal()):
             return False
 
         if validate_existence:
             try:
-                result = asyncio.run(MvgApi.__api(Base.ZDM, Endpoint.ZDM_STATION_IDS))
-                assert isinstance(result, list)
-                return station_id in result
+                return station_id in _run(MvgApi.station_ids_set())
             except (AssertionError, KeyError, MvgApiError):
                 raise MvgApiError("Bad API call: Could not parse station data")
 
         return True
 
+    @staticmethod
+    async def valid_station_id_async(station_id: str, validate_existence: bool = False) -> bool:
+        """
+        Check if the station id is a global station ID according to VDV Recommendation 432.
+
+        :param station_id: a global station id (e.g. 'de:09162:70')
+        :param validate_existence: validate the existence in a list from the API
+        :raises MvgApiError: raised on communication failure or unexpected result
+        :return: True if valid, False if Invalid
+        """
+        if not MvgApi.valid_station_id(station_id):
+            return False
+        if validate_existence:
+            return station_id in await MvgApi.station_ids_set()
+        return True
+
     @staticmethod
     async def __api(
             base: Base,
             endpoint: Endpoint,
             args: Optional[Dict[str, Any]] = None,
             path_param: Optional[str] = None,
+            revalidate: bool = False,
     ) -> Any:
         """
         Call the API endpoint with the given arguments.
@@ -115,45 +614,93 @@ class MvgApi:
         :param endpoint: the endpoint
         :param args: a dictionary containing arguments
         :param path_param: additional path parameter if needed (e.g., station_id for line/station)
+        :param revalidate: keep the response if it has an ETag and revalidate it on the next call
         :raises MvgApiError: raised on communication failure or unexpected result
         :return: the response as JSON object
         """
-        url = furl(base.value)
-        endpoint_path, _ = endpoint.value
-        if path_param:
-            url /= f"{endpoint_path}/{path_param}"
-        else:
-            url /= endpoint_path
+        url = _url(base, endpoint, path_param)
+
+        # Revalidate the response of the previous call if it was sent with an ETag
+        headers = {}
+        etag_key = (url, tuple(args.items()) if args else ())
+        previous = _etags.get(etag_key) if revalidate else None
+        if previous is not None:
+            headers["If-None-Match"] = previous[0]
+
+        status, content_type, etag, body = await (_get_httpx if MVGAPI_HTTP2 else _get_aiohttp)(url, args, headers)
+        if status == 304 and previous is not None:
+            # Parse the kept body again, so callers never share mutable results
+            etag, body = previous
+        elif status != 200:
+            raise MvgApiError(f"Bad API call: Got response ({status}) from {url}")
+        # Bodies other than JSON are rejected when decoding anyway, so this check is opt-in
+        elif MVGAPI_CHECK_CONTENT_TYPE and not content_type.startswith("application/json"):
+            raise MvgApiError(f"Bad API call: Got content type {content_type} from {url}")
+        try:
+            result = orjson.loads(body)
+        except orjson.JSONDecodeError as exc:
+            raise MvgApiError(f"Bad API call: Got invalid JSON from {url}") from exc
+        if revalidate and etag:
+            _etags[etag_key] = (etag, body)
+        return result
+
+    @staticmethod
+    async def __api_items(
+            base: Base,
+            endpoint: Endpoint,
+            args: Optional[Dict[str, Any]] = None,
+            path_param: Optional[str] = None,
+    ) -> AsyncIterator[Any]:
+        """
+        Call the API endpoint with the given arguments and iterate over the items of the resulting array.
 
-        if args:
-            url.set(query_params=args)
+        With the optional dependency ijson, items are parsed while the response arrives, so the
+        complete response is never held in memory. Otherwise, or with HTTP/2, this falls back to
+        a regular call.
 
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                        url.url, headers={"Accept": "application/json, text/plain, */*"}
-                ) as resp:
-                    if resp.status != 200:
-                        raise MvgApiError(
-                            f"Bad API call: Got response ({resp.status}) from {url.url}"
-                        )
-                    if resp.content_type != "application/json":
-                        raise MvgApiError(
-                            f"Bad API call: Got content type {resp.content_type} from {url.url}"
-                        )
-                    return await resp.json()
-
-        except aiohttp.ClientError as exc:
-            raise MvgApiError(f"Bad API call: Got {str(type(exc))} from {url.url}") from exc
+        :param base: the API base
+        :param endpoint: the endpoint
+        :param args: a dictionary containing arguments
+        :param path_param: additional path parameter if needed (e.g., station_id for line/station)
+        :raises MvgApiError: raised on communication failure or if the result is not an array
+        :return: an asynchronous iterator over the items
+        """
+        url = _url(base, endpoint, path_param)
+        if ijson is None or MVGAPI_HTTP2:
+            result = await MvgApi.__api(base, endpoint, args, path_param)
+            if not isinstance(result, list):
+                raise MvgApiError(f"Bad API call: Expected an array from {url}")
+            for item in result:
+                yield item
+            return
+
+        async for item in _iter_aiohttp(url, args):
+            yield item
+
+    @staticmethod
+    async def aclose() -> None:
+        """Close the client session of the running event loop, e.g. on application shutdown."""
+        loop = asyncio.get_running_loop()
+        session = _sessions.pop(loop, None)
+        if session is not None:
+            await session[1].aclose()
+        client = _clients.pop(loop, None)
+        if client is not None:
+            await client[1].aclose()
+
+    @staticmethod
+    def close() -> None:
+        """Close the client session of the synchronous methods, e.g. on application shutdown."""
+        _run(MvgApi.aclose())
 
     @staticmethod
-    async def station_query(query: str) -> Optional[Dict[str, Any]]:
+    async def station_query(query: str) -> Optional[Station]:
         """
         Find a station by station name and place.
 
         :param query: name, place (e.g., 'Hauptbahnhof, München')
         :raises MvgApiError: raised on communication failure or unexpected result
-        :return: the first matching station as dictionary with keys 'id', 'name', 'place', 'latitude', 'longitude'
+        :return: the first matching station
         """
         query = query.strip()
         try:
@@ -161,53 +708,53 @@ class MvgApi:
             result = await MvgApi.__api(Base.FIB, Endpoint.FIB_LOCATION, args)
             assert isinstance(result, list)
 
-            # Return None if result is empty
-            if not result:
-                return None
-
-            # Return the first station type entry
-            for location in result:
-                if location.get("type") == "STATION":
-                    station = {
-                        "id": location.get("globalId", ""),
-                        "name": location.get("name", ""),
-                        "place": location.get("place", ""),
-                        "latitude": location.get("latitude", 0.0),
-                        "longitude": location.get("longitude", 0.0),
-                    }
-                    return station
-
-            # Return None if no station was found
-            return None
+            # Return the first station type entry or None if no station was found
+            location = next((location for location in result if location.get("type") == "STATION"), None)
+            return None if location is None else _project_station(location)
 
         except (AssertionError, KeyError) as exc:
             raise MvgApiError("Bad API call: Could not parse station data") from exc
 
     @staticmethod
-    def station_query_sync(query: str) -> Optional[Dict[str, Any]]:
+    def station_query_sync(query: str) -> Optional[Station]:
         """
         Synchronous wrapper for station_query.
 
         :param query: name, place (e.g., 'Hauptbahnhof, München')
-        :return: the first matching station as dictionary or None
+        :return: the first matching station or None
         """
-        return asyncio.run(MvgApi.station_query(query))
+        return _run(MvgApi.station_query(query))
 
     @staticmethod
-    async def station_ids_async() -> List[str]:
+    async def station_ids_set() -> FrozenSet[str]:
         """
-        Retrieve a list of all valid station ids.
+        Retrieve a set of all valid station ids for fast lookups, e.g. to validate many station ids.
 
         :raises MvgApiError: raised on communication failure or unexpected result
-        :return: station ids as a list
+        :return: station ids as a set
         """
-        try:
-            result = await MvgApi.__api(Base.ZDM, Endpoint.ZDM_STATION_IDS)
+
+        async def fetch() -> FrozenSet[str]:
+            result = await MvgApi.__api(Base.ZDM, Endpoint.ZDM_STATION_IDS, revalidate=True)
             assert isinstance(result, list)
-            return sorted(result)
+            return frozenset(result)
+
+        try:
+            station_ids: FrozenSet[str] = await _cached(("station_ids",), MVGAPI_STATIC_TTL, fetch)
+            return station_ids
         except (AssertionError, KeyError) as exc:
             raise MvgApiError("Bad API call: Could not parse station data") from exc
 
+    @staticmethod
+    async def station_ids_async() -> List[str]:
+        """
+        Retrieve a list of all valid station ids.
+
+        :raises MvgApiError: raised on communication failure or unexpected result
+        :return: station ids as a list
+        """
+        return sorted(await MvgApi.station_ids_set())
+
     @staticmethod
     def station_ids() -> List[str]:
         """
@@ -215,7 +762,7 @@ class MvgApi:
 
         :return: station ids as a list
         """
-        return asyncio.run(MvgApi.station_ids_async())
+        return _run(MvgApi.station_ids_async())
 
     @staticmethod
     async def stations_async() -> List[Dict[str, Any]]:
@@ -225,8 +772,12 @@ class MvgApi:
         :raises MvgApiError: raised on communication failure or unexpected result
         :return: a list of stations as dictionaries
         """
+
+        async def fetch() -> List[Dict[str, Any]]:
+            return [station async for station in MvgApi.__api_items(Base.ZDM, Endpoint.ZDM_STATIONS)]
+
         try:
-            result = await MvgApi.__api(Base.ZDM, Endpoint.ZDM_STATIONS)
+            result = await _cached_json(("stations",), MVGAPI_STATIC_TTL, fetch)
             assert isinstance(result, list)
             return result
         except (AssertionError, KeyError) as exc:
@@ -240,7 +791,49 @@ class MvgApi:
         :raises MvgApiError: raised on communication failure or unexpected result
         :return: a list of stations as dictionaries
         """
-        return asyncio.run(MvgApi.stations_async())
+        return _run(MvgApi.stations_async())
+
+    @staticmethod
+    async def __all_lines() -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Retrieve the lines of all stations.
+
+        :return: a list of unique lines as dictionaries and whether the lines of all stations were retrieved
+        """
+        station_ids = await MvgApi.station_ids_set()
+        # To improve performance, fetch lines concurrently, bounded by the connection pool size
+        semaphore = asyncio.Semaphore(MVGAPI_CONNECTION_LIMIT_PER_HOST)
+
+        async def lines_of_station(station_id: str) -> List[Dict[str, Any]]:
+            async with semaphore:
+                items = MvgApi.__api_items(Base.FIB, Endpoint.FIB_LINE_STATION, path_param=station_id)
+                return [line async for line in items]
+
+        # Remove duplicates based on 'label' and 'transportType' as stations complete
+        seen: Set[Tuple[Any, Any]] = set()
+        unique_lines: List[Dict[str, Any]] = []
+        complete = True
+        tasks = [asyncio.ensure_future(lines_of_station(station_id)) for station_id in station_ids]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                try:
+                    lines = await next_result
+                except asyncio.CancelledError:  # pylint: disable=try-except-raise
+                    raise  # it is an Exception before Python 3.8
+                except Exception:  # pylint: disable=broad-except
+                    # Skip stations which failed, including the lines they returned before
+                    complete = False
+                    continue
+                for line in lines:
+                    key = (line.get("label"), line.get("transportType"))
+                    if key not in seen:
+                        seen.add(key)
+                        unique_lines.append(line)
+        finally:
+            # Do not leave requests running if the call is cancelled
+            for task in tasks:
+                task.cancel()
+        return unique_lines, complete
 
     @staticmethod
     async def lines_async(station_id: Optional[str] = None) -> List[Dict[str, Any]]:
@@ -254,35 +847,27 @@ class MvgApi:
         :raises MvgApiError: raised on communication failure or unexpected result
         :return: a list of lines as dictionaries
         """
+
+        async def fetch() -> List[Dict[str, Any]]:
+            result = await MvgApi.__api(Base.FIB, Endpoint.FIB_LINE_STATION, path_param=station_id, revalidate=True)
+            assert isinstance(result, list)
+            return result
+
         try:
             if station_id:
                 # Fetch lines for a specific station
-                result = await MvgApi.__api(Base.FIB, Endpoint.FIB_LINE_STATION, path_param=station_id)
-                assert isinstance(result, list)
-                return result
+                result = await _cached_json(("lines", station_id), MVGAPI_LINES_TTL, fetch)
             else:
-                # Fetch lines for all stations
-                station_ids = await MvgApi.station_ids_async()
-                # To improve performance, fetch lines concurrently
-                tasks = [
-                    MvgApi.__api(Base.FIB, Endpoint.FIB_LINE_STATION, path_param=station_id)
-                    for station_id in station_ids
-                ]
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-                all_lines = []
-                for res in results:
-                    if isinstance(res, list):
-                        all_lines.extend(res)
-                    elif isinstance(res, Exception):
-                        # Log or handle exceptions as needed
-                        continue
-                # Remove duplicates based on 'label' and 'transportType'
-                unique_lines = {}
-                for line in all_lines:
-                    key = (line.get("label"), line.get("transportType"))
-                    if key not in unique_lines:
-                        unique_lines[key] = line
-                return list(unique_lines.values())
+                # Fetch lines for all stations, but only cache them if no station failed
+                body = _cache_get(("lines",), MVGAPI_LINES_TTL)
+                if body is not None:
+                    result = orjson.loads(body)
+                else:
+                    result, complete = await MvgApi.__all_lines()
+                    if complete:
+                        _cache_set(("lines",), orjson.dumps(result))
+            assert isinstance(result, list)
+            return result
 
         except (AssertionError, KeyError) as exc:
             raise MvgApiError("Bad API call: Could not parse lines data") from exc
@@ -298,27 +883,27 @@ class MvgApi:
         :param station_id: Optional global station id (e.g., 'de:09162:70')
         :return: a list of lines as dictionaries
         """
-        return asyncio.run(MvgApi.lines_async(station_id))
+        return _run(MvgApi.lines_async(station_id))
 
     @staticmethod
-    async def nearby_async(latitude: float, longitude: float) -> Optional[Dict[str, Any]]:
+    async def nearby_async(latitude: float, longitude: float) -> Optional[Station]:
         """
         Find the nearest station by coordinates.
 
         :param latitude: coordinate in decimal degrees
         :param longitude: coordinate in decimal degrees
         :raises MvgApiError: raised on communication failure or unexpected result
-        :return: the first matching station as dictionary with keys 'id', 'name', 'place', 'latitude', 'longitude'
+        :return: the first matching station
 
         Example result::
 
-            {
-                'id': 'de:09162:70',
-                'name': 'Universität',
-                'place': 'München',
-                'latitude': 48.15007,
-                'longitude': 11.581
-            }
+            Station(
+                id='de:09162:70',
+                name='Universität',
+                place='München',
+                latitude=48.15007,
+                longitude=11.581
+            )
         """
         try:
             args = {
@@ -328,53 +913,42 @@ class MvgApi:
             result = await MvgApi.__api(Base.FIB, Endpoint.FIB_NEARBY, args)
             assert isinstance(result, list)
 
-            # Return the first station type entry
-            for location in result:
-                if location.get("type") == "STATION":
-                    station = {
-                        "id": location.get("globalId", ""),
-                        "name": location.get("name", ""),
-                        "place": location.get("place", ""),
-                        "latitude": location.get("latitude", 0.0),
-                        "longitude": location.get("longitude", 0.0),
-                    }
-                    return station
-
-            # Return None if no station was found
-            return None
+            # Return the first station type entry or None if no station was found
+            location = next((location for location in result if location.get("type") == "STATION"), None)
+            return None if location is None else _project_station(location)
 
         except (AssertionError, KeyError) as exc:
             raise MvgApiError("Bad API call: Could not parse nearby station data") from exc
 
     @staticmethod
-    def nearby(latitude: float, longitude: float) -> Optional[Dict[str, Any]]:
+    def nearby(latitude: float, longitude: float) -> Optional[Station]:
         """
         Find the nearest station by coordinates.
 
         :param latitude: coordinate in decimal degrees
         :param longitude: coordinate in decimal degrees
         :raises MvgApiError: raised on communication failure or unexpected result
-        :return: the first matching station as dictionary with keys 'id', 'name', 'place', 'latitude', 'longitude'
+        :return: the first matching station
 
         Example result::
 
-            {
-                'id': 'de:09162:70',
-                'name': 'Universität',
-                'place': 'München',
-                'latitude': 48.15007,
-                'longitude': 11.581
-            }
+            Station(
+                id='de:09162:70',
+                name='Universität',
+                place='München',
+                latitude=48.15007,
+                longitude=11.581
+            )
         """
-        return asyncio.run(MvgApi.nearby_async(latitude, longitude))
+        return _run(MvgApi.nearby_async(latitude, longitude))
 
     @staticmethod
     async def departures_async(
             station_id: str,
             limit: int = MVGAPI_DEFAULT_LIMIT,
             offset: int = 0,
-            transport_types: Optional[List[TransportType]] = None,
-    ) -> List[Dict[str, Any]]:
+            transport_types: Optional[Sequence[TransportType]] = None,
+    ) -> List[Departure]:
         """
         Retrieve the next departures for a station by station id.
 
@@ -384,20 +958,20 @@ class MvgApi:
         :param transport_types: filter by transport type, defaults to None
         :raises MvgApiError: raised on communication failure or unexpected result
         :raises ValueError: raised on bad station id format
-        :return: a list of departures as dictionaries
+        :return: a list of departures
 
         Example result::
 
-            [{
-                'time': 1668524580,
-                'planned': 1668524460,
-                'line': 'U3',
-                'destination': 'Fürstenried West',
-                'type': 'U-Bahn',
-                'icon': 'mdi:subway',
-                'cancelled': False,
-                'messages': []
-            }, ... ]
+            [Departure(
+                time=1668524580,
+                planned=1668524460,
+                line='U3',
+                destination='Fürstenried West',
+                type='U-Bahn',
+                icon='mdi:subway',
+                cancelled=False,
+                messages=[]
+            ), ... ]
         """
         station_id = station_id.strip()
         if not MvgApi.valid_station_id(station_id):
@@ -410,31 +984,12 @@ class MvgApi:
                 "limit": limit,
             }
             if transport_types is None:
-                transport_types = TransportType.all()
-            args["transportTypes"] = ",".join([product.name for product in transport_types])
+                args["transportTypes"] = _ALL_TRANSPORT_TYPES_ARG
+            else:
+                args["transportTypes"] = ",".join([product.name for product in transport_types])
             result = await MvgApi.__api(Base.FIB, Endpoint.FIB_DEPARTURE, args)
             assert isinstance(result, list)
-
-            departures: List[Dict[str, Any]] = []
-            for departure in result:
-                transport_type = departure.get("transportType", "BAHN")
-                # Handle unexpected transport types gracefully
-                if transport_type not in TransportType.__members__:
-                    transport_type = "BAHN"  # Default transport type
-
-                departures.append(
-                    {
-                        "time": int(departure.get("realtimeDepartureTime", 0) / 1000),
-                        "planned": int(departure.get("plannedDepartureTime", 0) / 1000),
-                        "line": departure.get("label", ""),
-                        "destination": departure.get("destination", ""),
-                        "type": TransportType[transport_type].value[0],
-                        "icon": TransportType[transport_type].value[1],
-                        "cancelled": departure.get("cancelled", False),
-                        "messages": departure.get("messages", []),
-                    }
-                )
-            return departures
+            return [_project_departure(departure) for departure in result]
 
         except (AssertionError, KeyError) as exc:
             raise MvgApiError("Bad MVG API call: Invalid departure data") from exc
@@ -443,8 +998,8 @@ class MvgApi:
             self,
             limit: int = MVGAPI_DEFAULT_LIMIT,
             offset: int = 0,
-            transport_types: Optional[List[TransportType]] = None,
-    ) -> List[Dict[str, Any]]:
+            transport_types: Optional[Sequence[TransportType]] = None,
+    ) -> List[Departure]:
         """
         Retrieve the next departures.
 
@@ -452,22 +1007,22 @@ class MvgApi:
         :param offset: offset (e.g., walking distance to the station) in minutes, defaults to 0
         :param transport_types: filter by transport type, defaults to None
         :raises MvgApiError: raised on communication failure or unexpected result
-        :return: a list of departures as dictionaries
+        :return: a list of departures
 
         Example result::
 
-            [{
-                'time': 1668524580,
-                'planned': 1668524460,
-                'line': 'U3',
-                'destination': 'Fürstenried West',
-                'type': 'U-Bahn',
-                'icon': 'mdi:subway',
-                'cancelled': False,
-                'messages': []
-            }, ... ]
-        """
-        return asyncio.run(
+            [Departure(
+                time=1668524580,
+                planned=1668524460,
+                line='U3',
+                destination='Fürstenried West',
+                type='U-Bahn',
+                icon='mdi:subway',
+                cancelled=False,
+                messages=[]
+            ), ... ]
+        """
+        return _run(
             MvgApi.departures_async(
                 station_id=self.station_id,
                 limit=limit,
@@ -499,4 +1054,4 @@ class MvgApi:
         :raises MvgApiError: raised on communication failure or unexpected result
         :return: a list of messages as dictionaries
         """
-        return asyncio.run(MvgApi.messages_async())
+        return _run(MvgApi.messages_async())
@@ -0,0 +1,63 @@
+"""Fixtures for offline tests"""
+
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import orjson
+import pytest
+
+from mvg import mvgapi
+
+Response = Tuple[int, str, Optional[str], bytes]
+
+
+class FakeApi:
+    """Canned API responses in place of HTTP requests"""
+
+    def __init__(self) -> None:
+        self.responses: Dict[str, Callable[[Dict[str, str]], Response]] = {}
+        self.requests: List[Tuple[str, Optional[Dict[str, Any]], Dict[str, str]]] = []
+
+    def add(
+        self,
+        base: mvgapi.Base,
+        endpoint: mvgapi.Endpoint,
+        result: Any,
+        path_param: Optional[str] = None,
+        etag: Optional[str] = None,
+    ) -> str:
+        """Respond with a JSON result, or with 304 to a request with a matching ETag"""
+        url = mvgapi._url(base, endpoint, path_param)  # pylint: disable=protected-access
+        body = orjson.dumps(result)
+
+        def respond(headers: Dict[str, str]) -> Response:
+            if etag is not None and headers.get("If-None-Match") == etag:
+                return 304, "", etag, b""
+            return 200, "application/json", etag, body
+
+        self.responses[url] = respond
+        return url
+
+    def count(self, url: str) -> int:
+        """Return the number of requests of a URL"""
+        return sum(1 for request in self.requests if request[0] == url)
+
+    async def get(self, url: str, params: Optional[Dict[str, Any]], headers: Dict[str, str]) -> Response:
+        """Replacement of the aiohttp transport"""
+        self.requests.append((url, params, dict(headers)))
+        if url not in self.responses:
+            return 404, "text/plain", None, b""
+        return self.responses[url](headers)
+
+
+@pytest.fixture(name="fake_api")
+def fixture_fake_api(monkeypatch: pytest.MonkeyPatch) -> Iterator[FakeApi]:
+    """Replace HTTP requests by canned responses and start with empty caches"""
+    fake_api = FakeApi()
+    monkeypatch.setattr(mvgapi, "_get_aiohttp", fake_api.get)
+    monkeypatch.setattr(mvgapi, "MVGAPI_HTTP2", False)
+    monkeypatch.setattr(mvgapi, "ijson", None)
+    mvgapi._cache.clear()  # pylint: disable=protected-access
+    mvgapi._etags.clear()  # pylint: disable=protected-access
+    yield fake_api
+    mvgapi._cache.clear()  # pylint: disable=protected-access
+    mvgapi._etags.clear()  # pylint: disable=protected-access
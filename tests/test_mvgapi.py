@@ -0,0 +1,412 @@
+"""Offline tests with canned API responses"""
+
+import asyncio
+import json
+import re
+from collections.abc import Mapping
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from mvg import Departure, MvgApi, MvgApiError, Station, mvgapi
+from mvg.mvgapi import Base, Endpoint
+
+from conftest import FakeApi, Response
+
+STATION_IDS = ["de:09162:70", "de:09162:6"]
+STATION = Station(id="de:09162:70", name="Universität", place="München", latitude=48.15007, longitude=11.581)
+DEPARTURE = Departure(
+    time=1668524580,
+    planned=1668524460,
+    line="U3",
+    destination="Fürstenried West",
+    type="U-Bahn",
+    icon="mdi:subway",
+    cancelled=False,
+    messages=[],
+)
+LINES = {
+    "de:09162:70": [{"label": "U3", "transportType": "UBAHN"}, {"label": "154", "transportType": "BUS"}],
+    "de:09162:6": [{"label": "U3", "transportType": "UBAHN"}, {"label": "S1", "transportType": "SBAHN"}],
+}
+
+
+@pytest.mark.asyncio
+async def test_cache_hit(fake_api: FakeApi) -> None:
+    """Test: static results are requested once within their time to live"""
+    ids_url = fake_api.add(Base.ZDM, Endpoint.ZDM_STATION_IDS, STATION_IDS)
+    stations_url = fake_api.add(Base.ZDM, Endpoint.ZDM_STATIONS, [{"id": "de:09162:70"}])
+    assert await MvgApi.station_ids_async() == sorted(STATION_IDS)
+    assert await MvgApi.station_ids_async() == sorted(STATION_IDS)
+    assert await MvgApi.stations_async() == [{"id": "de:09162:70"}]
+    assert await MvgApi.stations_async() == [{"id": "de:09162:70"}]
+    assert fake_api.count(ids_url) == 1
+    assert fake_api.count(stations_url) == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_miss(fake_api: FakeApi, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test: expired results are requested again"""
+    monkeypatch.setattr(mvgapi, "MVGAPI_STATIC_TTL", 0)
+    ids_url = fake_api.add(Base.ZDM, Endpoint.ZDM_STATION_IDS, STATION_IDS)
+    await MvgApi.station_ids_async()
+    await MvgApi.station_ids_async()
+    assert fake_api.count(ids_url) == 2
+
+
+@pytest.mark.asyncio
+async def test_not_modified(fake_api: FakeApi, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test: expired results are revalidated with their ETag and not shared between callers"""
+    monkeypatch.setattr(mvgapi, "MVGAPI_LINES_TTL", 0)
+    url = fake_api.add(Base.FIB, Endpoint.FIB_LINE_STATION, LINES["de:09162:70"], "de:09162:70", etag='"v1"')
+    first = await MvgApi.lines_async("de:09162:70")
+    first[0]["label"] = "changed"
+    second = await MvgApi.lines_async("de:09162:70")
+    assert second == LINES["de:09162:70"]
+    assert [request[2].get("If-None-Match") for request in fake_api.requests if request[0] == url] == [None, '"v1"']
+
+
+@pytest.mark.asyncio
+async def test_cache_not_shared(fake_api: FakeApi) -> None:
+    """Test: cached results are not shared between callers within their time to live"""
+    fake_api.add(Base.ZDM, Endpoint.ZDM_STATIONS, [{"id": "de:09162:70", "name": "Universität"}])
+    fake_api.add(Base.ZDM, Endpoint.ZDM_STATION_IDS, ["de:09162:70"])
+    url = fake_api.add(Base.FIB, Endpoint.FIB_LINE_STATION, LINES["de:09162:70"], "de:09162:70")
+    for _ in range(2):
+        stations = await MvgApi.stations_async()
+        assert stations == [{"id": "de:09162:70", "name": "Universität"}]
+        stations[0]["name"] = "changed"
+        for lines in (await MvgApi.lines_async("de:09162:70"), await MvgApi.lines_async()):
+            assert lines == LINES["de:09162:70"]
+            lines[0]["label"] = "changed"
+    assert len(fake_api.requests) == 4
+    assert fake_api.count(url) == 2
+
+
+@pytest.mark.asyncio
+async def test_departures_not_revalidated(fake_api: FakeApi) -> None:
+    """Test: departures are neither kept nor revalidated"""
+    url = fake_api.add(Base.FIB, Endpoint.FIB_DEPARTURE, [], etag='"v1"')
+    await MvgApi.departures_async("de:09162:70")
+    await MvgApi.departures_async("de:09162:70")
+    assert [request[2].get("If-None-Match") for request in fake_api.requests if request[0] == url] == [None, None]
+    assert not mvgapi._etags  # pylint: disable=protected-access
+
+
+@pytest.mark.asyncio
+async def test_all_lines_cache(fake_api: FakeApi) -> None:
+    """Test: lines of all stations are deduplicated and only cached if no station failed"""
+    fake_api.add(Base.ZDM, Endpoint.ZDM_STATION_IDS, STATION_IDS)
+    url = fake_api.add(Base.FIB, Endpoint.FIB_LINE_STATION, LINES["de:09162:70"], "de:09162:70")
+    lines = await MvgApi.lines_async()
+    assert lines == LINES["de:09162:70"]
+    await MvgApi.lines_async()
+    assert fake_api.count(url) == 2
+
+    fake_api.add(Base.FIB, Endpoint.FIB_LINE_STATION, LINES["de:09162:6"], "de:09162:6")
+    lines = await MvgApi.lines_async()
+    assert sorted(line["label"] for line in lines) == ["154", "S1", "U3"]
+    await MvgApi.lines_async()
+    assert fake_api.count(url) == 3
+
+
+def test_sync_calls_share_loop_and_session(fake_api: FakeApi, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test: synchronous methods run on one background loop and reuse its client session"""
+    used: List[Tuple[asyncio.AbstractEventLoop, aiohttp.ClientSession]] = []
+
+    async def get(url: str, params: Optional[Dict[str, Any]], headers: Dict[str, str]) -> Response:
+        used.append((asyncio.get_running_loop(), await mvgapi._get_session()))  # pylint: disable=protected-access
+        return await fake_api.get(url, params, headers)
+
+    monkeypatch.setattr(mvgapi, "_get_aiohttp", get)
+    location = {"type": "STATION", "globalId": "de:09162:70", "name": "Universität", "place": "München"}
+    fake_api.add(Base.FIB, Endpoint.FIB_LOCATION, [location])
+    fake_api.add(Base.FIB, Endpoint.FIB_NEARBY, [location])
+    fake_api.add(Base.FIB, Endpoint.FIB_DEPARTURE, [])
+    assert MvgApi("Universität, München").station_id == "de:09162:70"
+    assert MvgApi.nearby(48.1, 11.5) == MvgApi.station_query_sync("Universität, München")
+    assert MvgApi("de:09162:70").departures() == []
+    MvgApi.close()
+
+    assert len(used) == 4
+    assert len({id(loop) for loop, _ in used}) == 1
+    assert len({id(session) for _, session in used}) == 1
+    assert used[0][1].closed
+
+
+def test_session_closed_with_loop(fake_api: FakeApi, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test: client sessions of event loops are closed when the loop shuts down or by aclose()"""
+    used: List[aiohttp.ClientSession] = []
+
+    async def get(url: str, params: Optional[Dict[str, Any]], headers: Dict[str, str]) -> Response:
+        used.append(await mvgapi._get_session())  # pylint: disable=protected-access
+        return await fake_api.get(url, params, headers)
+
+    async def query_and_close() -> None:
+        await MvgApi.station_query("Universität, München")
+        await MvgApi.aclose()
+        assert used[-1].closed
+
+    monkeypatch.setattr(mvgapi, "_get_aiohttp", get)
+    fake_api.add(Base.FIB, Endpoint.FIB_LOCATION, [])
+    asyncio.run(MvgApi.station_query("Universität, München"))
+    asyncio.run(MvgApi.station_query("Universität, München"))
+    asyncio.run(query_and_close())
+    assert len(used) == 3
+    assert all(session.closed for session in used)
+
+
+@pytest.mark.asyncio
+async def test_resolver_closed(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test: the resolver of a client session is closed with it"""
+    closed: List[aiohttp.abc.AbstractResolver] = []
+
+    class Resolver(aiohttp.ThreadedResolver):
+        """Resolver which records that it was closed"""
+
+        async def close(self) -> None:
+            closed.append(self)
+            await super().close()
+
+    monkeypatch.setattr(aiohttp, "AsyncResolver", Resolver)
+    await mvgapi._get_session()  # pylint: disable=protected-access
+    assert not closed
+    await MvgApi.aclose()
+    assert len(closed) == 1
+
+
+@pytest.mark.asyncio
+async def test_sync_call_in_running_loop(fake_api: FakeApi) -> None:
+    """Test: synchronous methods refuse to block a running loop"""
+    with pytest.raises(RuntimeError):
+        MvgApi.station_ids()
+    assert not fake_api.requests
+
+
+@pytest.mark.parametrize(
+    ("station_id", "valid"),
+    [
+        ("de:09162:70", True),
+        ("de:12:1", True),
+        ("de:12345:1", True),
+        ("de:1:2", False),
+        ("de:123456:1", False),
+        ("de:09162:", False),
+        ("de::70", False),
+        ("de:09162:70:1", False),
+        ("de:09162:70\n", False),
+        ("at:09162:70", False),
+        ("de:09162:7\u00b2", False),
+        ("de:\uff10\uff19\uff11\uff16\uff12:70", True),
+        ("de:\u0660\u0669:\u0667\u0660", True),
+    ],
+)
+def test_valid_station_id(station_id: str, valid: bool) -> None:
+    """Test: station id format, including digits other than ASCII, like the former regular expression"""
+    assert MvgApi.valid_station_id(station_id) is valid
+    assert bool(re.fullmatch(r"de:\d{2,5}:\d+", station_id)) is valid
+
+
+@pytest.mark.asyncio
+async def test_items_not_array(fake_api: FakeApi) -> None:
+    """Test: results other than arrays are rejected and not cached without streaming"""
+    url = fake_api.add(Base.ZDM, Endpoint.ZDM_STATIONS, {"error": "unavailable"})
+    for _ in range(2):
+        with pytest.raises(MvgApiError):
+            await MvgApi.stations_async()
+    assert fake_api.count(url) == 2
+
+
+@pytest.mark.asyncio
+async def test_station_lines_not_array(fake_api: FakeApi) -> None:
+    """Test: lines of a station other than arrays are rejected and not cached"""
+    url = fake_api.add(Base.FIB, Endpoint.FIB_LINE_STATION, {"error": "unavailable"}, "de:09162:70")
+    for _ in range(2):
+        with pytest.raises(MvgApiError):
+            await MvgApi.lines_async("de:09162:70")
+    assert fake_api.count(url) == 2
+
+
+async def stream_chunks(request: web.Request) -> web.StreamResponse:
+    """Send the chunks of the response body given by the path one by one"""
+    chunks = {
+        "/zdm/stations": [b" [", b'{"id": "de:09162:70", "latitude": 48.15}', b', {"id": "de:09162:6"}', b"]"],
+        "/zdm/error": [b" ", b'{"error": "unavailable"}'],
+    }[request.path]
+    response = web.StreamResponse(headers={"Content-Type": "application/json"})
+    await response.prepare(request)
+    for chunk in chunks:
+        await response.write(chunk)
+    await response.write_eof()
+    return response
+
+
+@pytest.mark.asyncio
+async def test_streamed_items(fake_api: FakeApi, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test: arrays are parsed while they arrive and other results are rejected"""
+    monkeypatch.setattr(mvgapi, "ijson", pytest.importorskip("ijson"))
+    app = web.Application()
+    app.router.add_get("/zdm/{path}", stream_chunks)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    try:
+        host, port = runner.addresses[0][:2]
+        local_base = Enum("Base", {"FIB": f"http://{host}:{port}/fib", "ZDM": f"http://{host}:{port}/zdm"})
+        monkeypatch.setattr(mvgapi, "Base", local_base)
+
+        stations = await MvgApi.stations_async()
+        assert stations == [{"id": "de:09162:70", "latitude": 48.15}, {"id": "de:09162:6"}]
+        assert isinstance(stations[0]["latitude"], float)
+
+        error_endpoint = Enum("Endpoint", {"ERROR": ("/error", [])})
+        items: AsyncIterator[Any] = MvgApi._MvgApi__api_items(local_base.ZDM, error_endpoint.ERROR)
+        with pytest.raises(MvgApiError):
+            _ = [item async for item in items]
+        assert not fake_api.requests
+    finally:
+        await MvgApi.aclose()
+        await runner.cleanup()
+
+
+@pytest.mark.parametrize(
+    ("result", "expected"),
+    [
+        (
+            STATION,
+            {"id": "de:09162:70", "name": "Universität", "place": "München", "latitude": 48.15007, "longitude": 11.581},
+        ),
+        (
+            DEPARTURE,
+            {
+                "time": 1668524580,
+                "planned": 1668524460,
+                "line": "U3",
+                "destination": "Fürstenried West",
+                "type": "U-Bahn",
+                "icon": "mdi:subway",
+                "cancelled": False,
+                "messages": [],
+            },
+        ),
+    ],
+)
+def test_result_mapping(result: Any, expected: Dict[str, Any]) -> None:
+    """Test: stations and departures can be read like dictionaries"""
+    assert isinstance(result, Mapping)
+    assert not hasattr(result, "__dict__")
+    for key, value in expected.items():
+        assert result[key] == value
+        assert key in result
+        assert result.get(key) == value
+    assert "unknown" not in result
+    assert result.get("unknown") is None
+    assert result.get("unknown", 0) == 0
+    with pytest.raises(KeyError):
+        _ = result["unknown"]
+    assert list(result) == list(expected)
+    assert len(result) == len(expected)
+    assert dict(result) == expected
+    assert result.as_dict() == expected
+    assert json.loads(json.dumps(result.as_dict())) == expected
+
+
+@pytest.mark.asyncio
+async def test_departures(fake_api: FakeApi) -> None:
+    """Test: departures are converted, with a fallback for unknown and missing transport types"""
+    departure = {
+        "realtimeDepartureTime": 1668524580123,
+        "plannedDepartureTime": 1668524460999.0,
+        "label": "U3",
+        "destination": "Fürstenried West",
+        "transportType": "UBAHN",
+        "cancelled": False,
+        "messages": [],
+    }
+    url = fake_api.add(
+        Base.FIB,
+        Endpoint.FIB_DEPARTURE,
+        [departure, {**departure, "transportType": "UNKNOWN"}, {"label": "X"}],
+    )
+    departures = await MvgApi.departures_async(" de:09162:70 ", limit=3, transport_types=[mvgapi.TransportType.UBAHN])
+    assert departures[0] == DEPARTURE
+    assert isinstance(departures[0].planned, int)
+    assert (departures[1].type, departures[1].icon) == ("Bahn", "mdi:train")
+    assert departures[2] == Departure(0, 0, "X", "", "Bahn", "mdi:train", False, [])
+    assert fake_api.requests == [
+        (url, {"globalId": "de:09162:70", "offsetInMinutes": 0, "limit": 3, "transportTypes": "UBAHN"}, {})
+    ]
+
+
+@pytest.mark.asyncio
+async def test_create(fake_api: FakeApi) -> None:
+    """Test: create an instance by station id or by station name within a running loop"""
+    mvg = await MvgApi.create(" de:09162:70 ")
+    assert mvg.station_id == "de:09162:70"
+    assert not fake_api.requests
+
+    location = {"type": "STATION", "globalId": "de:09162:70", "name": "Universität", "place": "München"}
+    url = fake_api.add(Base.FIB, Endpoint.FIB_LOCATION, [{"type": "POI", "globalId": "poi"}, location])
+    mvg = await MvgApi.create("Universität, München")
+    assert mvg.station_id == "de:09162:70"
+    assert fake_api.requests == [(url, {"query": "Universität, München"}, {})]
+
+    fake_api.add(Base.FIB, Endpoint.FIB_LOCATION, [{"type": "POI", "globalId": "poi"}])
+    with pytest.raises(ValueError):
+        await MvgApi.create("Nowhere")
+
+
+@pytest.mark.asyncio
+async def test_valid_station_id_async(fake_api: FakeApi) -> None:
+    """Test: existence of station ids is validated against the cached set of station ids"""
+    url = fake_api.add(Base.ZDM, Endpoint.ZDM_STATION_IDS, STATION_IDS)
+    assert await MvgApi.valid_station_id_async("de:09162:70")
+    assert not fake_api.requests
+    assert await MvgApi.valid_station_id_async("de:09162:70", validate_existence=True)
+    assert not await MvgApi.valid_station_id_async("de:09162:71", validate_existence=True)
+    assert not await MvgApi.valid_station_id_async("de:1:2", validate_existence=True)
+    assert await MvgApi.station_ids_set() == frozenset(STATION_IDS)
+    assert fake_api.count(url) == 1
+    with pytest.raises(RuntimeError):
+        MvgApi.valid_station_id("de:09162:70", validate_existence=True)
+
+
+def test_valid_station_id_existence(fake_api: FakeApi) -> None:
+    """Test: existence of station ids is validated by the synchronous method outside of a running loop"""
+    fake_api.add(Base.ZDM, Endpoint.ZDM_STATION_IDS, STATION_IDS)
+    assert MvgApi.valid_station_id("de:09162:6", validate_existence=True)
+    assert not MvgApi.valid_station_id("de:09162:7", validate_existence=True)
+    mvgapi._cache.clear()  # pylint: disable=protected-access
+    fake_api.add(Base.ZDM, Endpoint.ZDM_STATION_IDS, {"error": "unavailable"})
+    with pytest.raises(MvgApiError):
+        MvgApi.valid_station_id("de:09162:6", validate_existence=True)
+    MvgApi.close()
+
+
+@pytest.mark.asyncio
+async def test_all_lines_concurrency(fake_api: FakeApi, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test: requests for the lines of all stations are limited to the connections per host"""
+    monkeypatch.setattr(mvgapi, "MVGAPI_CONNECTION_LIMIT_PER_HOST", 3)
+    station_ids = [f"de:09162:{number}" for number in range(20)]
+    fake_api.add(Base.ZDM, Endpoint.ZDM_STATION_IDS, station_ids)
+    for station_id in station_ids:
+        fake_api.add(Base.FIB, Endpoint.FIB_LINE_STATION, [{"label": station_id, "transportType": "BUS"}], station_id)
+    in_flight = []
+    peak = 0
+
+    async def get(url: str, params: Optional[Dict[str, Any]], headers: Dict[str, str]) -> Response:
+        nonlocal peak
+        in_flight.append(url)
+        peak = max(peak, len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.remove(url)
+        return await fake_api.get(url, params, headers)
+
+    monkeypatch.setattr(mvgapi, "_get_aiohttp", get)
+    lines = await MvgApi.lines_async()
+    assert sorted(line["label"] for line in lines) == sorted(station_ids)
+    assert peak == 3